@@ -0,0 +1,142 @@
+# answer_cache.py
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "answer_cache.pkl")
+
+# Cosine similarity a new question needs to reuse a cached answer
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "500"))
+
+# Seconds before a cached answer expires
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+class AnswerCache:
+    """Semantic cache of generated answers, keyed on the query embedding.
+
+    An entry only matches questions asked against the same scope: the
+    encoder plus the content fingerprint of the indexed repository. So
+    re-indexing different code, or switching embedding backends, never
+    serves stale answers. Entries are evicted least-recently-used
+    once the cache is full, and expire after `ttl` seconds.
+    """
+    def __init__(self, path=ANSWER_CACHE_PATH, threshold=ANSWER_CACHE_THRESHOLD,
+                 max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> entry dict, oldest use first
+        self.next_key = 0
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+        self.lock = threading.Lock()
+        self.load()
+
+    def lookup(self, embedding, scope):
+        """Return the cached answer for the closest question in scope, or None"""
+        embedding = normalize(embedding)
+        now = time.time()
+        with self.lock:
+            self.evict_expired(now)
+            best_key, best_score = None, self.threshold
+            for key, entry in self.entries.items():
+                if entry["scope"] != scope or entry["embedding"].shape != embedding.shape:
+                    continue
+                score = float(entry["embedding"] @ embedding)
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            entry = self.entries[best_key]
+            self.entries.move_to_end(best_key)
+            self.hits += 1
+            self.latency_saved += entry["latency"]
+            print(f"[INFO] Answer cache hit ({best_score:.3f}) for: {entry['question']}")
+            return entry["answer"]
+
+    def store(self, question, embedding, scope, answer, latency):
+        """Cache an answer that took `latency` seconds to generate"""
+        with self.lock:
+            self.entries[self.next_key] = {
+                "question": question,
+                "embedding": normalize(embedding),
+                "scope": scope,
+                "answer": answer,
+                "latency": latency,
+                "created": time.time(),
+            }
+            self.next_key += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.save()
+
+    def clear(self):
+        """Drop every cached answer"""
+        with self.lock:
+            self.entries.clear()
+            self.save()
+
+    def stats(self):
+        """Return hit/miss counts, hit ratio and generation time saved in seconds"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "latency_saved": self.latency_saved,
+        }
+
+    def evict_expired(self, now):
+        """Drop entries older than the TTL (caller holds the lock)"""
+        expired = [key for key, entry in self.entries.items() if now - entry["created"] > self.ttl]
+        for key in expired:
+            del self.entries[key]
+
+    def save(self):
+        """Write the cache to disk (caller holds the lock)"""
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({"entries": self.entries, "next_key": self.next_key}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[WARNING] Failed to save answer cache: {e}")
+
+    def load(self):
+        """Load the cache from disk if it exists"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+            self.entries = data["entries"]
+            self.next_key = data["next_key"]
+            print(f"[INFO] Loaded {len(self.entries)} cached answers from {self.path}")
+        except Exception as e:
+            print(f"[WARNING] Failed to load answer cache: {e}")
+
+
+def normalize(embedding):
+    """Flatten an embedding to a unit-length float32 vector"""
+    embedding = np.asarray(embedding, dtype="float32").ravel()
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm else embedding
+
+
+# Global answer cache instance
+answer_cache = AnswerCache()
@@ -3,6 +3,7 @@ import os
 import subprocess
 import sys
 from rag_gemini import generate_answer
+from answer_cache import answer_cache
 from main import process_repository
 import time
 
@@ -200,6 +201,14 @@ def main():
         if 'repo_url' in st.session_state:
             st.info(f"📁 Repository: {st.session_state.repo_url}")
         
+        # Answer cache stats
+        stats = answer_cache.stats()
+        st.info(
+            f"⚡ Answer cache: {stats['hit_ratio']:.0%} hit ratio "
+            f"({stats['hits']}/{stats['hits'] + stats['misses']}), "
+            f"{stats['latency_saved']:.1f}s saved, {stats['entries']} answers stored"
+        )
+        
         # Clear chat history
         if st.button("🗑️ Clear Chat History"):
             if 'chat_history' in st.session_state:
@@ -0,0 +1,102 @@
+# benchmark_encoders.py
+
+import argparse
+import os
+import time
+import numpy as np
+
+from utils import get_code_files
+from chunker import chunk_python_code, chunk_markdown, chunk_generic_code
+from encoders import SentenceTransformerEncoder, load_encoder, MIN_POOL_BATCH
+
+BACKENDS = ["torch", "torch-int8", "onnx", "onnx-int8"]
+
+
+def load_chunks(base_dir, limit):
+    """Chunk the supported files under base_dir, like main.py does"""
+    chunks = []
+    for file in get_code_files(base_dir):
+        if file.endswith(".py"):
+            chunks.extend(chunk_python_code(file))
+        elif file.endswith((".md", ".txt")):
+            chunks.extend(chunk_markdown(file))
+        else:
+            chunks.extend(chunk_generic_code(file))
+    return [c for c in chunks if c][:limit]
+
+
+def timed_encode(encoder, texts):
+    """Return (embeddings, texts per second), after a warm-up outside the timed region"""
+    # A full pool-sized batch also starts the process pool, so worker startup is not timed
+    encoder.encode(texts[:MIN_POOL_BATCH])
+    start = time.perf_counter()
+    embeddings = encoder.encode(texts)
+    elapsed = time.perf_counter() - start
+    return embeddings, len(texts) / elapsed
+
+
+def drift(baseline, embeddings, top_k=5):
+    """Cosine similarity to the baseline and overlap of each text's top-k neighbours"""
+    def normalize(x):
+        return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+    baseline, embeddings = normalize(baseline), normalize(embeddings)
+    cosine = (baseline * embeddings).sum(axis=1)
+
+    k = min(top_k, len(baseline))
+    expected = np.argsort(-(baseline @ baseline.T), axis=1)[:, :k]
+    actual = np.argsort(-(embeddings @ embeddings.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(e) & set(a)) / k for e, a in zip(expected, actual)])
+    return cosine.mean(), cosine.min(), overlap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends on a repository's chunks")
+    parser.add_argument("--dir", default="repo", help="Directory to chunk (default: repo)")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--limit", type=int, default=2000, help="Maximum number of chunks")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    args = parser.parse_args()
+
+    texts = load_chunks(args.dir, args.limit)
+    if not texts:
+        print(f"[ERROR] No chunks found under {args.dir}")
+        return
+    print(f"[INFO] Benchmarking on {len(texts)} chunks with {os.cpu_count()} CPUs\n")
+
+    baseline_encoder = SentenceTransformerEncoder(args.model, processes=1)
+    baseline, baseline_rate = timed_encode(baseline_encoder, texts)
+
+    rows = [("torch (baseline)", baseline_rate, 1.0, 1.0, 1.0)]
+
+    if os.cpu_count() > 1 and len(texts) < MIN_POOL_BATCH:
+        print(f"[WARNING] Skipping the multi-process row: the pool needs at least {MIN_POOL_BATCH} chunks\n")
+    elif os.cpu_count() > 1:
+        pool_encoder = SentenceTransformerEncoder(args.model, processes=0)
+        embeddings, rate = timed_encode(pool_encoder, texts)
+        pool_encoder.close()
+        rows.append((f"torch x{pool_encoder.processes} processes", rate) + drift(baseline, embeddings))
+
+    for backend in args.backends:
+        if backend == "torch":
+            continue
+        try:
+            if backend == "torch-int8":
+                # Single process, whatever EMBEDDING_PROCESSES says
+                encoder = SentenceTransformerEncoder(args.model, quantize=True, processes=1)
+            else:
+                encoder = load_encoder(args.model, backend)
+        except ImportError as e:
+            print(f"[WARNING] Skipping {backend}: {e}")
+            continue
+        embeddings, rate = timed_encode(encoder, texts)
+        encoder.close()
+        rows.append((backend, rate) + drift(baseline, embeddings))
+
+    print(f"{'backend':<24}{'texts/s':>10}{'speedup':>10}{'mean cos':>10}{'min cos':>10}{'top-5':>8}")
+    for name, rate, mean_cos, min_cos, overlap in rows:
+        print(f"{name:<24}{rate:>10.1f}{rate / baseline_rate:>9.2f}x{mean_cos:>10.4f}{min_cos:>10.4f}{overlap:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -75,3 +75,27 @@ def chunk_generic_code(file_path):
         return [chunk.strip() for chunk in content.split('\n\n') if chunk.strip()]
     
     return [content] if content.strip() else []
+
+
+def chunk_line_ranges(file_path, chunks):
+    """Return 1-based (start_line, end_line) for each chunk, (0, 0) if not found"""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+    except OSError:
+        return [(0, 0)] * len(chunks)
+
+    # Chunks are stripped slices of the file in order, so scan forward
+    ranges = []
+    position = 0
+    for chunk in chunks:
+        start = content.find(chunk, position)
+        if start == -1:
+            ranges.append((0, 0))
+            continue
+        start_line = content.count('\n', 0, start) + 1
+        end_line = start_line + chunk.count('\n')
+        ranges.append((start_line, end_line))
+        position = start + len(chunk)
+
+    return ranges
@@ -4,37 +4,87 @@ import importlib
 # embedder.py
 
 from vector_store import vector_store
+from metadata_store import detect_language
+from chunker import chunk_line_ranges
 from uuid import uuid4
 
 # Define the embedding model name
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Chunks embedded and stored per add_documents call during ingestion
+INGEST_BATCH_SIZE = 4096
+
+def build_metadatas(chunks, source_file=None):
+    """Build the per-chunk metadata dicts for one source file"""
+    # Metadata helps in filtering/debugging later
+    file_path = source_file.replace('\\', '/') if source_file else "unknown"
+    line_ranges = chunk_line_ranges(source_file, chunks) if source_file else [(0, 0)] * len(chunks)
+    return [
+        {
+            "file": file_path,
+            "chunk_number": i + 1,
+            "language": detect_language(file_path),
+            "start_line": start_line,
+            "end_line": end_line,
+        }
+        for i, (start_line, end_line) in enumerate(line_ranges)
+    ]
+
 def add_chunks_to_db(chunks, source_file=None):
+    """Adds a list of text chunks from one (optional) source file to the FAISS vector store"""
+
+    if not chunks:
+        print(f"[WARNING] No chunks to embed for file: {source_file}")
+        return True
+
+    return add_files_to_db([(source_file, chunks)])
+
+def add_files_to_db(file_chunks, batch_size=INGEST_BATCH_SIZE):
     """
-    Adds a list of text chunks to the FAISS vector store.
+    Adds the chunks of many files to the FAISS vector store in batches.
+
+    Files are grouped into batches of about `batch_size` chunks, so a failing
+    batch only loses its own files.
 
     Args:
-        chunks (List[str]): The list of text chunks.
-        source_file (str): Optional. The source file path for metadata.
+        file_chunks (List[Tuple[str, List[str]]]): (source_file, chunks) pairs.
+        batch_size (int): Chunks to embed and store per batch.
+
+    Returns:
+        bool: True if every batch was stored.
     """
 
-    if not chunks:
-        print(f"[WARNING] No chunks to embed for file: {source_file}")
-        return
+    batches = []
+    texts, metadatas, files = [], [], 0
+    for source_file, chunks in file_chunks:
+        if not chunks:
+            continue
+        texts.extend(chunks)
+        metadatas.extend(build_metadatas(chunks, source_file))
+        files += 1
+        if len(texts) >= batch_size:
+            batches.append((texts, metadatas, files))
+            texts, metadatas, files = [], [], 0
+    if texts:
+        batches.append((texts, metadatas, files))
 
-    # Metadata helps in filtering/debugging later
-    metadatas = [
-        {"file": source_file.replace('\\', '/') if source_file else "unknown", "chunk_number": i + 1}
-        for i in range(len(chunks))
-    ]
+    if not batches:
+        print("[WARNING] No chunks to embed")
+        return True
+
+    failed = 0
+    for texts, metadatas, files in batches:
+        try:
+            vector_store.add_documents(texts, metadatas)
+            print(f"[INFO] Stored {len(texts)} chunks from {files} files into FAISS vector store.")
 
-    try:
-        # Add to FAISS vector store
-        vector_store.add_documents(chunks, metadatas)
-        print(f"[INFO] Stored {len(chunks)} chunks from {source_file or 'unknown source'} into FAISS vector store.")
+        except Exception as e:
+            failed += 1
+            print(f"[ERROR] Failed to store {len(texts)} chunks from {files} files: {e}")
 
-    except Exception as e:
-        print(f"[ERROR] Failed to store chunks for {source_file}: {e}")
+    if failed:
+        print(f"[ERROR] {failed} of {len(batches)} batches could not be stored")
+    return failed == 0
 
 def clear_database():
     """Clear all data from FAISS vector store"""
@@ -0,0 +1,214 @@
+# encoders.py
+
+import json
+import os
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+# Backend used when none is passed explicitly: torch, torch-int8, onnx or onnx-int8
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+# Worker processes for the torch backend: 1 disables the pool, 0 uses every core.
+# torch-int8 always runs in one process: quantized models cannot be sent to workers.
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", "1"))
+
+# Batches smaller than this are not worth shipping to the process pool
+MIN_POOL_BATCH = 256
+
+ONNX_MODEL_DIR = "onnx_models"
+
+# Pooling modes the ONNX encoder can reproduce
+ONNX_POOLING_MODES = ("mean", "cls", "max", "mean_sqrt_len_tokens")
+
+
+class SentenceTransformerEncoder:
+    """PyTorch encoder, optionally int8-quantized and spread over several processes"""
+    def __init__(self, model_name, quantize=False, processes=EMBEDDING_PROCESSES):
+        self.model = SentenceTransformer(model_name, device="cpu" if quantize else None)
+        if quantize:
+            import torch
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.processes = processes if processes > 0 else os.cpu_count()
+        if quantize and self.processes > 1:
+            print(f"[WARNING] Ignoring {self.processes} encoder processes: the int8 model cannot be sent to workers")
+            self.processes = 1
+        self.pool = None
+
+    def encode(self, texts, show_progress_bar=False):
+        """Encode texts into a float32 array of shape (len(texts), dimension)"""
+        if self.processes > 1 and len(texts) >= MIN_POOL_BATCH:
+            if self.pool is None:
+                self.pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.processes)
+            embeddings = self.model.encode_multi_process(texts, self.pool)
+        else:
+            embeddings = self.model.encode(texts, show_progress_bar=show_progress_bar)
+        return np.asarray(embeddings, dtype="float32")
+
+    def close(self):
+        """Stop the worker pool if one was started"""
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+
+class ONNXEncoder:
+    """ONNX Runtime encoder, optionally int8-quantized.
+
+    Truncation length, pooling and normalization come from the exported
+    sentence-transformers config, so embeddings match the torch backend.
+    """
+    def __init__(self, model_name, quantize=False, batch_size=32):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx backends need onnxruntime: pip install onnxruntime")
+        from transformers import AutoTokenizer
+
+        model_dir = export_onnx(model_name)
+        model_path = os.path.join(model_dir, "model.onnx")
+        if quantize:
+            model_path = quantize_onnx(model_path)
+
+        with open(os.path.join(model_dir, "encoder_config.json")) as f:
+            config = json.load(f)
+        self.max_seq_length = config["max_seq_length"]
+        self.pooling_mode = config["pooling_mode"]
+        self.normalize = config["normalize"]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = os.cpu_count()
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+        self.batch_size = batch_size
+
+    def encode(self, texts, show_progress_bar=False):
+        """Encode texts into a float32 array of shape (len(texts), dimension)"""
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            tokens = self.tokenizer(
+                list(texts[start:start + self.batch_size]),
+                padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np",
+            )
+            inputs = {name: value.astype("int64") for name, value in tokens.items() if name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+
+            pooled = pool(hidden, tokens["attention_mask"], self.pooling_mode)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled)
+
+        if not batches:
+            return np.empty((0, self.dimension), dtype="float32")
+        return np.concatenate(batches).astype("float32")
+
+    def close(self):
+        pass
+
+
+def pool(hidden, attention_mask, pooling_mode):
+    """Pool token embeddings (batch, sequence, dim) into sentence embeddings like sentence-transformers"""
+    mask = attention_mask[..., None].astype("float32")
+    if pooling_mode == "cls":
+        return hidden[:, 0].copy()
+    if pooling_mode == "max":
+        return np.where(mask > 0, hidden, -1e9).max(axis=1)
+    summed = (hidden * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    if pooling_mode == "mean_sqrt_len_tokens":
+        return summed / np.sqrt(counts)
+    return summed / counts
+
+
+def pooling_mode_of(pooling):
+    """Read the pooling mode of a sentence-transformers Pooling module, across library versions"""
+    if hasattr(pooling, "get_pooling_mode_str"):
+        return pooling.get_pooling_mode_str()
+    return pooling.pooling_mode
+
+
+def encoder_config(model):
+    """Describe what the ONNX encoder must reproduce around the transformer of `model`"""
+    names = [type(module).__name__ for module in model]
+    if names not in (["Transformer", "Pooling"], ["Transformer", "Pooling", "Normalize"]):
+        raise ValueError(f"ONNX export supports Transformer, Pooling and optional Normalize modules, got {names}")
+
+    pooling_mode = pooling_mode_of(model[1])
+    if pooling_mode not in ONNX_POOLING_MODES:
+        raise ValueError(f"ONNX export does not support pooling mode {pooling_mode}")
+
+    return {
+        "max_seq_length": model[0].max_seq_length,
+        "pooling_mode": pooling_mode,
+        "normalize": names[-1] == "Normalize",
+    }
+
+
+def export_onnx(model_name, output_dir=ONNX_MODEL_DIR):
+    """Export the transformer behind a sentence-transformers model to ONNX, once"""
+    model_dir = os.path.join(output_dir, model_name.replace("/", "__"))
+    model_path = os.path.join(model_dir, "model.onnx")
+    config_path = os.path.join(model_dir, "encoder_config.json")
+    if os.path.exists(model_path) and os.path.exists(config_path):
+        return model_dir
+
+    import torch
+    print(f"[INFO] Exporting {model_name} to ONNX in {model_dir}")
+    os.makedirs(model_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    config = encoder_config(st_model)
+    transformer = st_model[0]
+    transformer.tokenizer.save_pretrained(model_dir)
+
+    model = transformer.auto_model.eval()
+    sample = transformer.tokenizer(["export sample"], return_tensors="pt")
+    # Positional export args must follow the forward() signature, not the tokenizer's key order
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+        )
+
+    # A quantized copy of a previous export would be stale now
+    quantized_path = model_path.replace(".onnx", ".int8.onnx")
+    if os.path.exists(quantized_path):
+        os.remove(quantized_path)
+
+    # Written last, so an interrupted export is redone on the next run
+    with open(config_path, "w") as f:
+        json.dump(config, f, indent=2)
+    return model_dir
+
+
+def quantize_onnx(model_path):
+    """Write a dynamically int8-quantized copy of an ONNX model, once"""
+    quantized_path = model_path.replace(".onnx", ".int8.onnx")
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        print(f"[INFO] Quantizing {model_path} to int8")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def load_encoder(model_name, backend=None):
+    """Create the encoder for `backend` (defaults to EMBEDDING_BACKEND)"""
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "torch":
+        return SentenceTransformerEncoder(model_name)
+    if backend == "torch-int8":
+        return SentenceTransformerEncoder(model_name, quantize=True)
+    if backend == "onnx":
+        return ONNXEncoder(model_name)
+    if backend == "onnx-int8":
+        return ONNXEncoder(model_name, quantize=True)
+    raise ValueError(f"Unknown embedding backend: {backend}")
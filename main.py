@@ -2,7 +2,7 @@
 
 from utils import clone_repo, get_code_files
 from chunker import chunk_python_code, chunk_markdown, chunk_generic_code
-from embedder import add_chunks_to_db
+from embedder import add_files_to_db
 import uuid
 import os
 
@@ -25,7 +25,8 @@ def process_repository(repo_url):
     files = get_code_files("repo")
     print(f"Found {len(files)} files to process")
     
-    # Process each file
+    # Chunk each file, then embed them in large batches
+    file_chunks = []
     for file in files:
         print(f"Processing: {file}")
         
@@ -40,9 +41,13 @@ def process_repository(repo_url):
             chunks = chunk_generic_code(file)
         
         if chunks:
-            # Add chunks to database
-            add_chunks_to_db(chunks, source_file=file)
-            print(f"Added {len(chunks)} chunks from {file}")
+            file_chunks.append((file, chunks))
+            print(f"Chunked {len(chunks)} chunks from {file}")
+    
+    # Add chunks to database
+    if not add_files_to_db(file_chunks):
+        print("Failed to store some chunks; the index is incomplete")
+        return False
     
     print("Repository processing completed!")
     return True
@@ -0,0 +1,205 @@
+# metadata_store.py
+
+import os
+import re
+import numpy as np
+
+# Language column values, indexed by the int8 stored per chunk
+LANGUAGES = ("unknown", "python", "markdown", "text", "json", "yaml", "javascript",
+             "typescript", "html", "css", "java", "c", "cpp", "dart", "php")
+
+EXTENSION_LANGUAGES = {
+    ".py": "python", ".md": "markdown", ".txt": "text", ".json": "json",
+    ".yaml": "yaml", ".yml": "yaml", ".js": "javascript", ".jsx": "javascript",
+    ".ts": "typescript", ".html": "html", ".css": "css", ".java": "java",
+    ".c": "c", ".cpp": "cpp", ".dart": "dart", ".php": "php",
+}
+
+COLUMNS = ("file_ids", "languages", "start_lines", "end_lines", "chunk_numbers")
+
+# Directory repositories are cloned into (see utils.clone_repo). Stored
+# paths keep it ("repo/src/app.py"); path filters are relative to it.
+CLONE_ROOT = "repo"
+
+
+def detect_language(path):
+    """Guess the language of a file from its extension"""
+    return EXTENSION_LANGUAGES.get(os.path.splitext(path)[1].lower(), "unknown")
+
+
+def relative_path(path, root=CLONE_ROOT):
+    """Strip the clone root from a stored path: "repo/src/app.py" -> "src/app.py" """
+    return path[len(root) + 1:] if path.startswith(root + '/') else path
+
+
+def normalize_filter_path(path):
+    """Normalize a user-supplied filter path: forward slashes, no "./", no trailing "/" """
+    path = path.replace('\\', '/')
+    while path.startswith('./'):
+        path = path[2:]
+    return path.strip('/')
+
+
+def glob_to_regex(pattern):
+    """Compile a path glob where * and ? stay within one directory and ** spans directories"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            regex.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            regex.append('[^/]')
+            i += 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile(''.join(regex) + r'\Z')
+
+
+class PathTable:
+    """Append-only table of interned file paths.
+
+    Stores share one table across versions: an older store only holds ids
+    that were assigned before it was built, so appends never change what
+    it sees. Appends must happen under the vector store's write lock.
+    """
+    def __init__(self, paths=()):
+        self.paths = []
+        self.ids = {}
+        for path in paths:
+            self.intern(path)
+
+    def intern(self, path):
+        path_id = self.ids.get(path)
+        if path_id is None:
+            path_id = len(self.paths)
+            self.paths.append(path)
+            self.ids[path] = path_id
+        return path_id
+
+
+class MetadataStore:
+    """Columnar, immutable chunk metadata.
+
+    One row per chunk, in FAISS id order. `extend` returns a new store and
+    leaves this one untouched so it can live inside a vector store snapshot.
+    """
+    def __init__(self, path_table=None, columns=None):
+        self.path_table = path_table if path_table is not None else PathTable()
+        if columns is None:
+            columns = {
+                "file_ids": np.empty(0, dtype=np.int32),
+                "languages": np.empty(0, dtype=np.int8),
+                "start_lines": np.empty(0, dtype=np.int32),
+                "end_lines": np.empty(0, dtype=np.int32),
+                "chunk_numbers": np.empty(0, dtype=np.int32),
+            }
+        self.file_ids = columns["file_ids"]
+        self.languages = columns["languages"]
+        self.start_lines = columns["start_lines"]
+        self.end_lines = columns["end_lines"]
+        self.chunk_numbers = columns["chunk_numbers"]
+        # Only paths interned before this store was built belong to it
+        self.num_paths = len(self.path_table.paths)
+
+    @classmethod
+    def from_dicts(cls, metadatas):
+        """Build a store from the old list-of-dicts metadata format"""
+        return cls().extend(metadatas)
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    def __getitem__(self, i):
+        return {
+            "file": self.path_table.paths[self.file_ids[i]],
+            "chunk_number": int(self.chunk_numbers[i]),
+            "language": LANGUAGES[self.languages[i]],
+            "start_line": int(self.start_lines[i]),
+            "end_line": int(self.end_lines[i]),
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def files(self):
+        """Return the distinct file paths referenced by this store"""
+        return self.path_table.paths[:self.num_paths]
+
+    def extend(self, metadatas):
+        """Return a new store with `metadatas` (list of dicts) appended"""
+        n = len(metadatas)
+        new = {
+            "file_ids": np.empty(n, dtype=np.int32),
+            "languages": np.empty(n, dtype=np.int8),
+            "start_lines": np.zeros(n, dtype=np.int32),
+            "end_lines": np.zeros(n, dtype=np.int32),
+            "chunk_numbers": np.empty(n, dtype=np.int32),
+        }
+        for i, meta in enumerate(metadatas):
+            path = meta.get("file", "unknown")
+            language = meta.get("language") or detect_language(path)
+            new["file_ids"][i] = self.path_table.intern(path)
+            new["languages"][i] = LANGUAGES.index(language) if language in LANGUAGES else 0
+            new["start_lines"][i] = meta.get("start_line", 0)
+            new["end_lines"][i] = meta.get("end_line", 0)
+            new["chunk_numbers"][i] = meta.get("chunk_number", i + 1)
+
+        columns = {name: np.concatenate([getattr(self, name), new[name]]) for name in COLUMNS}
+        return MetadataStore(self.path_table, columns)
+
+    def mask(self, language=None, path_glob=None, directory=None):
+        """Return a boolean row mask for the given filters, or None if unfiltered.
+
+        `path_glob` and `directory` are relative to the clone root, so
+        directory="src" selects repo/src/**. In `path_glob`, * and ? do not
+        cross "/": "*.py" only matches top-level files, "**/*.py" matches all.
+        """
+        if language is None and path_glob is None and directory is None:
+            return None
+
+        mask = np.ones(len(self), dtype=bool)
+
+        if language is not None:
+            if language not in LANGUAGES:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.languages == LANGUAGES.index(language)
+
+        if path_glob is not None or directory is not None:
+            # Match once per distinct path, then broadcast to rows via file ids
+            glob = glob_to_regex(normalize_filter_path(path_glob)) if path_glob is not None else None
+            prefix = None
+            if directory is not None:
+                prefix = normalize_filter_path(directory)
+                prefix = prefix + '/' if prefix else ''
+            relative_paths = [relative_path(path) for path in self.files()]
+            path_mask = np.array([
+                (glob is None or glob.match(path) is not None)
+                and (prefix is None or path.startswith(prefix))
+                for path in relative_paths
+            ], dtype=bool)
+            if len(path_mask):
+                mask &= path_mask[self.file_ids]
+            else:
+                mask[:] = False
+
+        return mask
+
+    def to_dict(self):
+        """Return a picklable representation for saving"""
+        data = {name: getattr(self, name) for name in COLUMNS}
+        data["paths"] = list(self.files())
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a store saved with `to_dict`"""
+        return cls(PathTable(data["paths"]), {name: data[name] for name in COLUMNS})
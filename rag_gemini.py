@@ -1,8 +1,10 @@
 import sys
 import importlib
+import time
 import streamlit as st
 
 from vector_store import vector_store
+from answer_cache import answer_cache
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
@@ -15,10 +17,18 @@ api_key = st.secrets.get("GEMINI_API_KEY", os.getenv("GEMINI_API_KEY", "AIzaSyDj
 genai.configure(api_key=api_key)
 model = genai.GenerativeModel('gemini-1.5-flash')
 
-def retrieve_relevant_chunks(query, top_k=5):
-    """Retrieve relevant chunks from FAISS vector store"""
+def retrieve_relevant_chunks(query, top_k=5, language=None, path_glob=None, directory=None, query_embedding=None,
+                             snapshot=None):
+    """Retrieve relevant chunks from FAISS vector store, optionally filtered.
+
+    language is a metadata_store.LANGUAGES name; path_glob and directory are
+    relative to the cloned repository root, e.g. directory="src/api".
+    """
     try:
-        documents, metadatas = vector_store.search(query, top_k)
+        documents, metadatas = vector_store.search(
+            query, top_k, language=language, path_glob=path_glob, directory=directory,
+            query_embedding=query_embedding, snapshot=snapshot,
+        )
         print(f"[DEBUG] Retrieved {len(documents)} documents")
         
         if not documents:
@@ -29,14 +39,18 @@ def retrieve_relevant_chunks(query, top_k=5):
         print(f"[ERROR] Failed to retrieve chunks: {e}")
         return None, None
 
-def get_current_repository_info(sources):
+def get_current_repository_info(sources, snapshot=None):
     """Extract repository information from source files"""
-    if not sources:
+    if snapshot is None:
+        snapshot = vector_store.snapshot()
+    # Prefer the indexed file table over the handful of retrieved sources
+    files = snapshot.metadatas.files() or sources
+    if not files:
         return "Unknown repository"
     
     # Look for README.md or package.json to identify the project
-    readme_files = [s for s in sources if "README.md" in s]
-    package_files = [s for s in sources if "package.json" in s]
+    readme_files = [f for f in files if f.endswith("README.md")]
+    package_files = [f for f in files if f.endswith("package.json")]
     
     if readme_files:
         return f"Repository with README: {readme_files[0]}"
@@ -44,15 +58,26 @@ def get_current_repository_info(sources):
         return f"Repository with package.json: {package_files[0]}"
     else:
         # Extract repo name from file paths
-        repo_name = sources[0].split('/')[0] if '/' in sources[0] else sources[0].split('\\')[0]
+        repo_name = files[0].split('/')[0] if '/' in files[0] else files[0].split('\\')[0]
         return f"Repository: {repo_name}"
 
 def generate_answer(query):
     """Generate answer using Google Gemini"""
     print(f"\n[USER QUESTION] {query}")
     
+    # Pin one index version: the cache scope, retrieval and repository info
+    # must all describe the same snapshot even if an ingest publishes meanwhile
+    snapshot = vector_store.snapshot()
+    scope = f"{vector_store.encoder_id}@{snapshot.fingerprint}"
+    
+    # Step 0: Reuse the answer to a similar question about the same indexed code
+    query_embedding = vector_store.encode_query(query)
+    cached_answer = answer_cache.lookup(query_embedding, scope)
+    if cached_answer is not None:
+        return cached_answer
+    
     # Step 1: Retrieve relevant chunks
-    chunks, metadatas = retrieve_relevant_chunks(query)
+    chunks, metadatas = retrieve_relevant_chunks(query, query_embedding=query_embedding, snapshot=snapshot)
     if not chunks:
         return "[ERROR] No relevant context found. Please try a different question."
     
@@ -61,7 +86,7 @@ def generate_answer(query):
     sources = list(set([meta.get("file", "unknown") for meta in metadatas]))
     
     # Get current repository info
-    current_repo = get_current_repository_info(sources)
+    current_repo = get_current_repository_info(sources, snapshot)
     
     # Step 3: Create prompt for Gemini
     prompt = f"""You are a helpful code documentation assistant. Based on the following code and documentation context, answer the user's question.
@@ -84,11 +109,14 @@ Answer:"""
     
     try:
         # Call Gemini API
+        start_time = time.time()
         response = model.generate_content(prompt)
         
         answer = response.text.strip()
         source_info = f"\n\n**Sources:** {', '.join(sources)}"
         
+        # Only real LLM answers are cached, never fallbacks
+        answer_cache.store(query, query_embedding, scope, answer + source_info, time.time() - start_time)
         return answer + source_info
         
     except Exception as e:
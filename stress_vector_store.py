@@ -0,0 +1,115 @@
+# stress_vector_store.py
+
+import argparse
+import sys
+import threading
+
+from vector_store import FAISSVectorStore
+
+QUERIES = ["def main", "class Config", "how to run", "import os", "README"]
+
+
+def check_results(documents, metadatas, top_k):
+    """Return a list of consistency errors for one search result"""
+    errors = []
+    if len(documents) != len(metadatas):
+        errors.append(f"{len(documents)} documents but {len(metadatas)} metadatas")
+    if len(documents) > top_k:
+        errors.append(f"{len(documents)} results for top_k={top_k}")
+    for doc, meta in zip(documents, metadatas):
+        # Every document is written with metadata naming it, so a mismatch means a torn read
+        if meta["file"] != f"stress/{doc}.py":
+            errors.append(f"document {doc!r} returned with metadata {meta}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check vector store consistency under parallel search and ingest")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=5, help="Documents per add_documents call")
+    parser.add_argument("--clear-every", type=int, default=30, help="Clear the store every N writes")
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    store = FAISSVectorStore(args.model, args.backend)
+    # A second store written concurrently must not share paths or state with the first
+    other = FAISSVectorStore(args.model, args.backend)
+    errors = []
+    searches = [0]
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def reader(reader_id):
+        i = 0
+        while not done.is_set():
+            query = QUERIES[(reader_id + i) % len(QUERIES)]
+            try:
+                documents, metadatas = store.search(query, args.top_k)
+                found = check_results(documents, metadatas, args.top_k)
+            except Exception as e:
+                found = [f"search raised {e!r}"]
+            with lock:
+                errors.extend(found)
+                searches[0] += 1
+            i += 1
+
+    def writer():
+        try:
+            for i in range(args.writes):
+                texts = [f"doc_{i}_{j}" for j in range(args.batch)]
+                store.add_documents(texts, [{"file": f"stress/{text}.py", "chunk_number": 1} for text in texts])
+                if args.clear_every and i % args.clear_every == args.clear_every - 1:
+                    store.clear()
+        except Exception as e:
+            with lock:
+                errors.append(f"write raised {e!r}")
+        finally:
+            done.set()
+
+    def other_writer():
+        try:
+            for i in range(args.writes):
+                texts = [f"other_{i}_{j}" for j in range(args.batch)]
+                other.add_documents(texts, [{"file": f"other/{text}.py", "chunk_number": 1} for text in texts])
+        except Exception as e:
+            with lock:
+                errors.append(f"second store write raised {e!r}")
+
+    threads = [threading.Thread(target=reader, args=(r,)) for r in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    threads.append(threading.Thread(target=other_writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = store.snapshot()
+    if len(snapshot.documents) != len(snapshot.metadatas) or (
+            snapshot.index is not None and snapshot.index.ntotal != len(snapshot.documents)):
+        errors.append("final snapshot index, documents and metadatas disagree")
+
+    leaked = [path for path in store.metadatas.files() if not path.startswith("stress/")]
+    leaked += [path for path in other.metadatas.files() if not path.startswith("other/")]
+    if leaked:
+        errors.append(f"{len(leaked)} paths leaked between stores, e.g. {leaked[0]}")
+    if len(other.documents) != args.writes * args.batch:
+        errors.append(f"second store holds {len(other.documents)} documents, expected {args.writes * args.batch}")
+    for doc, meta in zip(other.documents, other.metadatas):
+        if meta["file"] != f"other/{doc}.py":
+            errors.append(f"second store document {doc!r} has metadata {meta}")
+            break
+
+    print(f"\n[INFO] {searches[0]} searches by {args.readers} readers during {args.writes} writes")
+    if errors:
+        print(f"[ERROR] {len(errors)} consistency errors, first few:")
+        for error in errors[:10]:
+            print(f"  {error}")
+        sys.exit(1)
+    print("[INFO] No consistency errors")
+
+
+if __name__ == "__main__":
+    main()
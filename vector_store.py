@@ -1,78 +1,183 @@
 import faiss
+import hashlib
 import numpy as np
 import pickle
 import os
-from sentence_transformers import SentenceTransformer
+import threading
+from collections import namedtuple
+from encoders import load_encoder, EMBEDDING_BACKEND
+from metadata_store import MetadataStore
 from uuid import uuid4
 
+# Immutable view of the store. Searches read one snapshot and never see a
+# half-applied write; writers build a new snapshot and swap it in.
+Snapshot = namedtuple("Snapshot", ["index", "documents", "metadatas", "version", "fingerprint"])
+
+def empty_snapshot():
+    """Return a new empty snapshot; each store needs its own MetadataStore and path table"""
+    return Snapshot(index=None, documents=(), metadatas=MetadataStore(), version=0, fingerprint="")
+
+def fingerprint_documents(texts, previous=""):
+    """Fold texts into a content fingerprint, "" for no documents.
+
+    The fingerprint is the sum of per-document SHA-1 hashes modulo 2**160,
+    so it depends only on which chunks are indexed: adding them in one
+    batch, per file, or re-hashing everything on load gives the same value.
+    """
+    total = int(previous, 16) if previous else 0
+    for text in texts:
+        total += int(hashlib.sha1(text.encode('utf-8', errors='ignore')).hexdigest(), 16)
+    if not previous and not texts:
+        return ""
+    return f"{total % (1 << 160):040x}"
+
 class FAISSVectorStore:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        self.embedder = SentenceTransformer(model_name)
-        self.index = None
-        self.documents = []
-        self.metadatas = []
-        self.dimension = 384  # Dimension for all-MiniLM-L6-v2
-        
+    def __init__(self, model_name="all-MiniLM-L6-v2", backend=None):
+        self.backend = backend or EMBEDDING_BACKEND
+        self.embedder = load_encoder(model_name, self.backend)
+        # Embeddings from different models or backends are not comparable
+        self.encoder_id = f"{model_name}:{self.backend}"
+        self.dimension = self.embedder.dimension
+        self._snapshot = empty_snapshot()
+        self._write_lock = threading.Lock()
+
+    @property
+    def index(self):
+        return self._snapshot.index
+
+    @property
+    def documents(self):
+        return self._snapshot.documents
+
+    @property
+    def metadatas(self):
+        return self._snapshot.metadatas
+
+    @property
+    def version(self):
+        """Version of the currently published snapshot"""
+        return self._snapshot.version
+
+    @property
+    def fingerprint(self):
+        """Content hash of the indexed documents, "" when empty"""
+        return self._snapshot.fingerprint
+
+    def snapshot(self):
+        """Return the currently published snapshot"""
+        return self._snapshot
+
+    def _publish(self, index, documents, metadatas, fingerprint):
+        """Atomically replace the published snapshot (caller holds the write lock)"""
+        self._snapshot = Snapshot(
+            index=index,
+            documents=tuple(documents),
+            metadatas=metadatas,
+            version=self._snapshot.version + 1,
+            fingerprint=fingerprint,
+        )
+
     def add_documents(self, texts, metadatas=None):
-        """Add documents to the vector store"""
+        """Add documents to the vector store.
+
+        Every call copies the whole index, documents and metadata to publish
+        a new snapshot, so a write costs O(total documents). Writers should
+        batch: add a repository's chunks in one call, not one call per file.
+        """
         if not texts:
             return
             
-        # Generate embeddings
+        # Generate embeddings outside the lock, it is the slow part
         embeddings = self.embedder.encode(texts, show_progress_bar=True)
         
-        # Initialize index if not exists
-        if self.index is None:
-            self.index = faiss.IndexFlatIP(self.dimension)
-            
-        # Add to FAISS index
-        self.index.add(embeddings.astype('float32'))
-        
-        # Store documents and metadata
-        self.documents.extend(texts)
-        if metadatas:
-            self.metadatas.extend(metadatas)
-        else:
-            self.metadatas.extend([{"file": "unknown", "chunk_number": i+1} for i in range(len(texts))])
+        if not metadatas:
+            metadatas = [{"file": "unknown", "chunk_number": i+1} for i in range(len(texts))]
+
+        with self._write_lock:
+            current = self._snapshot
+
+            # Copy-on-write: never mutate an index a reader may be searching
+            if current.index is None:
+                index = faiss.IndexFlatIP(self.dimension)
+            else:
+                index = faiss.clone_index(current.index)
+            index.add(embeddings)
+
+            self._publish(
+                index,
+                current.documents + tuple(texts),
+                current.metadatas.extend(metadatas),
+                fingerprint_documents(texts, current.fingerprint),
+            )
             
         print(f"[INFO] Added {len(texts)} documents to FAISS vector store")
         
-    def search(self, query, top_k=5):
-        """Search for similar documents"""
-        if self.index is None or len(self.documents) == 0:
+    def encode_query(self, query):
+        """Embed a query as a (1, dimension) float32 array"""
+        return self.embedder.encode([query])
+
+    def search(self, query, top_k=5, language=None, path_glob=None, directory=None, query_embedding=None,
+               snapshot=None):
+        """Search for similar documents, optionally filtered by language, path glob or directory.
+
+        Paths are relative to the clone root: directory="src" or
+        path_glob="src/**/*.py" select repo/src. In path_glob, * stays within
+        one directory and ** spans directories (see MetadataStore.mask).
+
+        Pass `snapshot` to search a version the caller already holds.
+        """
+        # Lock-free: everything below reads from this one snapshot
+        if snapshot is None:
+            snapshot = self._snapshot
+        if snapshot.index is None or len(snapshot.documents) == 0:
             return [], []
+
+        # Turn filters into a FAISS ID selector so filtering happens inside the search
+        k = min(top_k, len(snapshot.documents))
+        search_kwargs = {}
+        mask = snapshot.metadatas.mask(language=language, path_glob=path_glob, directory=directory)
+        if mask is not None:
+            k = min(k, int(mask.sum()))
+            if k == 0:
+                return [], []
+            bitmap = np.packbits(mask, bitorder='little')
+            params = faiss.SearchParameters()
+            # IDSelectorBitmap takes the bitmap size in bytes
+            params.sel = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            search_kwargs['params'] = params
             
-        # Encode query
-        query_embedding = self.embedder.encode([query])
+        # Encode query, unless the caller already did
+        if query_embedding is None:
+            query_embedding = self.encode_query(query)
         
         # Search
-        scores, indices = self.index.search(query_embedding.astype('float32'), min(top_k, len(self.documents)))
+        scores, indices = snapshot.index.search(query_embedding, k, **search_kwargs)
         
         # Get results
         results = []
         result_metadatas = []
         
         for idx in indices[0]:
-            if idx < len(self.documents):
-                results.append(self.documents[idx])
-                result_metadatas.append(self.metadatas[idx])
+            if 0 <= idx < len(snapshot.documents):
+                results.append(snapshot.documents[idx])
+                result_metadatas.append(snapshot.metadatas[idx])
                 
         return results, result_metadatas
         
     def clear(self):
         """Clear all data"""
-        self.index = None
-        self.documents = []
-        self.metadatas = []
+        with self._write_lock:
+            self._publish(None, (), MetadataStore(), "")
         print("[INFO] Cleared FAISS vector store")
         
     def save(self, filepath):
         """Save the vector store to disk"""
-        if self.index is not None:
+        snapshot = self._snapshot
+        if snapshot.index is not None:
             data = {
-                'index': faiss.serialize_index(self.index),
-                'documents': self.documents,
-                'metadatas': self.metadatas
+                'index': faiss.serialize_index(snapshot.index),
+                'documents': list(snapshot.documents),
+                'metadatas': snapshot.metadatas.to_dict()
             }
             with open(filepath, 'wb') as f:
                 pickle.dump(data, f)
@@ -83,10 +188,19 @@ class FAISSVectorStore:
         if os.path.exists(filepath):
             with open(filepath, 'rb') as f:
                 data = pickle.load(f)
-            self.index = faiss.deserialize_index(data['index'])
-            self.documents = data['documents']
-            self.metadatas = data['metadatas']
+            # Files saved before the columnar store hold a list of dicts
+            if isinstance(data['metadatas'], dict):
+                metadatas = MetadataStore.from_dict(data['metadatas'])
+            else:
+                metadatas = MetadataStore.from_dicts(data['metadatas'])
+            with self._write_lock:
+                self._publish(
+                    faiss.deserialize_index(data['index']),
+                    data['documents'],
+                    metadatas,
+                    fingerprint_documents(data['documents']),
+                )
             print(f"[INFO] Loaded FAISS vector store from {filepath}")
 
 # Global vector store instance
-vector_store = FAISSVectorStore() 
\ No newline at end of file
+vector_store = FAISSVectorStore() 